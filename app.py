@@ -1,9 +1,12 @@
 import re
 import json
 import time
-from urllib.parse import urlparse, urljoin
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, urlsplit, urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import streamlit as st
 
@@ -11,6 +14,15 @@ import streamlit as st
 # CONFIGURATION / FALLBACKS
 # ------------------------------
 SCRAPER_API_KEY = ""  # optional fallback; leave empty if you don't have one
+PARSER = "lxml"  # C parser; noticeably faster than "html.parser" on large pages
+MAX_HTML_BYTES = 5_000_000  # pages beyond this are truncated rather than fully downloaded
+MAX_CSS_BYTES = 512_000  # enough to find @media / base font rules in bundled stylesheets
+
+# Only the Lighthouse audits we score; trims the ~1MB PSI response to a few KB
+PSI_FIELDS = ",".join(
+    f"lighthouseResult/audits/{a}/numericValue"
+    for a in ("largest-contentful-paint", "cumulative-layout-shift", "interactive", "total-blocking-time")
+)
 
 HEADERS = {
     "User-Agent": (
@@ -20,25 +32,76 @@ HEADERS = {
     )
 }
 
+# ------------------------------
+# HTTP SESSION
+# ------------------------------
+@st.cache_resource
+def get_session() -> requests.Session:
+    # One pooled keep-alive session shared by every fetch (and across reruns)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = get_session()
+
+# ------------------------------
+# PATTERNS (compiled once)
+# ------------------------------
+_WORD_RE = re.compile(r"\b\w+\b")
+_SENT_RE = re.compile(r"[.!?]+")
+_VOWEL_RE = re.compile(r"[aeiouy]+")
+_SLUG_RE = re.compile(r"[a-z0-9]+")
+# Zero-width lookahead so overlapping patterns (e.g. "/blog/product") are all reported
+_URL_TYPE_RE = re.compile(r"(?=(/blog/|/article|/product|/shop/|/service|/faq|/pricing\b|/price\b))")
+_MEDIA_RE = re.compile(r"@media\s*\(max\-width|\(min\-width", re.I)
+_FONT16_RE = re.compile(r"font-size\s*:\s*1?6px", re.I)
+_BODY_FONT16_RE = re.compile(r"font-size\s*:\s*16px", re.I)  # <body style>: exactly 16px
+_POPUP_CLASS_RE = re.compile(r"modal|popup|overlay", re.I)
+_SPACING_HINTS = ("px;", "padding", "margin", "rem;", "gap-")  # plain substrings, commonest first
+
 # ------------------------------
 # FETCHERS
 # ------------------------------
+def read_capped(r: requests.Response, max_bytes: int = MAX_HTML_BYTES) -> str:
+    # Read a streamed body up to max_bytes, then stop downloading
+    chunks = []
+    total = 0
+    for chunk in r.iter_content(chunk_size=65536):
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= max_bytes:
+            break
+    return b"".join(chunks)[:max_bytes].decode(r.encoding or "utf-8", errors="replace")
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_body(url: str, timeout=15, max_bytes: int = MAX_HTML_BYTES) -> str:
+    # Raises on errors and non-200s: st.cache_data never stores an exception, so only
+    # successful bodies are cached and a failed URL is retried on the next run
+    with SESSION.get(url, timeout=timeout, stream=True) as r:
+        if r.status_code != 200:
+            raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+        return read_capped(r, max_bytes)
+
+
 def fetch_html(url: str) -> str | None:
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
-        if r.status_code == 200:
-            return r.text
-        st.warning(f"First attempt failed: HTTP {r.status_code}")
+        return fetch_body(url)
+    except requests.HTTPError as e:
+        st.warning(f"First attempt failed: HTTP {e.response.status_code}")
     except Exception as e:
         st.warning(f"Error during normal fetch: {e}")
 
     if SCRAPER_API_KEY:
         try:
             api_url = f"http://api.scraperapi.com?api_key={SCRAPER_API_KEY}&url={url}"
-            r = requests.get(api_url, timeout=30)
-            if r.status_code == 200:
-                return r.text
-            st.error(f"ScraperAPI failed: HTTP {r.status_code}")
+            return fetch_body(api_url, timeout=30)
+        except requests.HTTPError as e:
+            st.error(f"ScraperAPI failed: HTTP {e.response.status_code}")
         except Exception as e:
             st.error(f"ScraperAPI error: {e}")
     return None
@@ -46,17 +109,44 @@ def fetch_html(url: str) -> str | None:
 
 def fetch_resource_head(url: str, timeout=10):
     try:
-        r = requests.head(url, headers=HEADERS, timeout=timeout, allow_redirects=True)
+        r = SESSION.head(url, timeout=timeout, allow_redirects=True)
         return r
     except Exception:
         return None
 
 
+def fetch_heads(urls, timeout=6) -> dict:
+    # HEAD each distinct URL once, in parallel over the pooled keep-alive session
+    unique = list(dict.fromkeys(urls))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, len(unique))) as ex:
+        return dict(zip(unique, ex.map(lambda u: fetch_resource_head(u, timeout=timeout), unique)))
+
+
+def fetch_text(url: str, timeout=10, max_bytes: int = MAX_CSS_BYTES) -> str | None:
+    # Stylesheets share fetch_body's cache, so only successful downloads are reused
+    try:
+        return fetch_body(url, timeout=timeout, max_bytes=max_bytes)
+    except Exception:
+        return None
+
+
+def fetch_texts(urls, timeout=10) -> list[str]:
+    # GET the URLs in parallel; bodies of the 200 responses, in input order
+    urls = list(urls)
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(8, len(urls))) as ex:
+        return [t for t in ex.map(lambda u: fetch_text(u, timeout=timeout), urls) if t is not None]
+
+
 def try_get_json_ld(soup: BeautifulSoup):
     items = []
     for tag in soup.find_all("script", {"type": "application/ld+json"}):
         try:
-            data = json.loads(tag.get_text(strip=True))
+            # .string is the lone text child (the usual case); json.loads ignores surrounding whitespace
+            data = json.loads(tag.string or tag.get_text())
             if isinstance(data, list):
                 items.extend(data)
             else:
@@ -68,53 +158,98 @@ def try_get_json_ld(soup: BeautifulSoup):
 # ------------------------------
 # HELPERS
 # ------------------------------
+def collect_dom(soup: BeautifulSoup, scripts: list) -> dict:
+    # Bucket every tag the scorers read in a single walk of the tree, so neither this
+    # function nor the pillars pay for a separate find/select per lookup. <script> tags are
+    # gone by now (visible_text strips them), so the caller passes the ones it saved
+    dom = {
+        "script": scripts,
+        "title": None, "meta_desc": None, "viewport": None, "canonical": None, "body": None,
+        "article": False, "popup": False,
+        "h1": [], "h2h3": [], "h2h3h4": [], "img": [], "a": [], "stylesheet": [], "cta": [],
+    }
+    for tag in soup.find_all(True):
+        name = tag.name
+        classes = tag.get("class") or ()
+        if not dom["popup"] and (tag.get("role") == "dialog" or any(_POPUP_CLASS_RE.search(c) for c in classes)):
+            dom["popup"] = True
+        # Probable CTAs: every <button>, plus links/inputs with "btn" anywhere in their class
+        if name == "button" or (name in ("a", "input") and any("btn" in c.lower() for c in classes)):
+            dom["cta"].append(tag)
+        if name == "a":
+            if tag.has_attr("href"):
+                dom["a"].append(tag)
+        elif name in ("h2", "h3"):
+            dom["h2h3"].append(tag)
+            dom["h2h3h4"].append(tag)
+        elif name == "h4":
+            dom["h2h3h4"].append(tag)
+        elif name == "h1":
+            dom["h1"].append(tag)
+        elif name == "img":
+            dom["img"].append(tag)
+        elif name == "link":
+            rel = [r.lower() for r in tag.get("rel") or ()]
+            if "canonical" in rel and dom["canonical"] is None:
+                dom["canonical"] = tag
+            if "stylesheet" in rel and tag.has_attr("href"):
+                dom["stylesheet"].append(tag)
+        elif name == "meta":
+            key = {"description": "meta_desc", "viewport": "viewport"}.get(tag.get("name"))
+            if key and dom[key] is None:
+                dom[key] = tag
+        elif name in ("title", "body"):
+            if dom[name] is None:
+                dom[name] = tag
+        elif name == "article":
+            dom["article"] = True
+    return dom
+
+
 def visible_text(soup: BeautifulSoup) -> str:
-    # Remove scripts/styles/noscript
-    for t in soup(["script", "style", "noscript"]):
-        t.decompose()
-    # Remove nav/footer/aside to reduce boilerplate noise (best-effort)
-    for t in soup(["nav", "footer", "aside"]):
-        t.decompose()
-    text = soup.get_text(separator=" ")
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    # Remove scripts/styles/noscript plus nav/footer/aside boilerplate (best-effort) in one pass
+    # extract() rather than decompose() so <script> tags gathered beforehand stay readable
+    for t in soup(["script", "style", "noscript", "nav", "footer", "aside"]):
+        t.extract()
+    # Split each string on whitespace so wrapped source text still collapses to single spaces
+    return " ".join(w for s in soup.stripped_strings for w in s.split())
 
 
 def count_words(text: str) -> int:
-    return len(re.findall(r"\b\w+\b", text))
+    return len(_WORD_RE.findall(text))
 
 
 def flesch_reading_ease(text: str) -> float:
     # Basic syllable estimate: count vowel groups
-    sentences = re.split(r"[.!?]+", text)
+    sentences = _SENT_RE.split(text)
     sentences = [s for s in sentences if s.strip()]
-    words = re.findall(r"\b\w+\b", text)
+    lowered = text.lower()
+    words = _WORD_RE.findall(lowered)
     if not words or not sentences:
         return 0.0
-    def syllables(w):
-        w = w.lower()
-        groups = re.findall(r"[aeiouy]+", w)
-        return max(1, len(groups))
-    total_syll = sum(syllables(w) for w in words)
+    # Vowel groups never span words, so one pass over the whole text counts them all;
+    # words without a vowel still count as one syllable
+    total_syll = len(_VOWEL_RE.findall(lowered)) + sum(1 for w in words if not _VOWEL_RE.search(w))
     asl = len(words) / max(1, len(sentences))
     asw = total_syll / max(1, len(words))
     score = 206.835 - (1.015 * asl) - (84.6 * asw)
     return round(score, 2)
 
 
-def detect_content_type(url: str, soup: BeautifulSoup, text: str, json_ld: list[str]) -> str:
-    u = url.lower()
-    # URL patterns
-    if "/blog/" in u or "/article" in u:
-        return "Blog Post"
-    if "/product" in u or "/shop/" in u:
-        return "Product Page"
-    if "/services" in u or "/service" in u or "solutions" in text[:600].lower():
+def detect_content_type(url: str, dom: dict, text: str, json_ld: list[str], wc: int) -> str:
+    # URL patterns, scanned once; the checks below keep their original precedence
+    hits = set(_URL_TYPE_RE.findall(url.lower()))
+    if hits:
+        if "/blog/" in hits or "/article" in hits:
+            return "Blog Post"
+        if "/product" in hits or "/shop/" in hits:
+            return "Product Page"
+    if "/service" in hits or "solutions" in text[:600].lower():
         return "Service Page"
-    if "/faq" in u:
-        return "FAQ Page"
-    if re.search(r"/(pricing|price)\b", u):
-        return "Landing Page"
+    if hits:
+        if "/faq" in hits:
+            return "FAQ Page"
+        return "Landing Page"  # /pricing or /price
 
     # JSON-LD types
     types = []
@@ -129,19 +264,17 @@ def detect_content_type(url: str, soup: BeautifulSoup, text: str, json_ld: list[
         return "Product Page"
     if "FAQPage" in types:
         return "FAQ Page"
-    if "Article" in types or "BlogPosting" in types or soup.find("article"):
+    if "Article" in types or "BlogPosting" in types or dom["article"]:
         # Very long? Pillar page
-        wc = count_words(text)
-        if wc >= 2000 and len(soup.find_all(["h2", "h3"])) >= 6:
+        if wc >= 2000 and len(dom["h2h3"]) >= 6:
             return "Pillar Page"
         return "Blog Post"
 
     # Heuristics
-    wc = count_words(text)
-    h2h3 = len(soup.find_all(["h2", "h3"]))
+    h2h3 = len(dom["h2h3"])
     if wc >= 2200 and h2h3 >= 6:
         return "Pillar Page"
-    if len(soup.find_all("h1")) == 1 and "get a quote" in text.lower():
+    if len(dom["h1"]) == 1 and "get a quote" in text.lower():
         return "Service Page"
     # Home?
     if urlparse(url).path in ["", "/", "/home", "/index.html"]:
@@ -151,14 +284,12 @@ def detect_content_type(url: str, soup: BeautifulSoup, text: str, json_ld: list[
 
 
 def tokens(s: str):
-    return [t.lower() for t in re.findall(r"[a-z0-9]+", s.lower())]
+    return _SLUG_RE.findall(s.lower())
 
 
 def url_slug_keywords(url: str, primary_kw: str) -> int:
-    path = urlparse(url).path
-    slug_parts = tokens(path)
-    kw_parts = tokens(primary_kw)
-    return len(set(slug_parts) & set(kw_parts))
+    # tokens() already lowercases; intersect the keyword set with the slug tokens directly
+    return len(set(tokens(primary_kw)).intersection(tokens(urlsplit(url).path)))
 
 
 def pct(numerator: int, denominator: int) -> float:
@@ -169,7 +300,25 @@ def pct(numerator: int, denominator: int) -> float:
 # ------------------------------
 # SCORING (YOUR FRAMEWORK)
 # ------------------------------
-def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_terms: list[str], originality_pct: float | None):
+# Per-content-type targets, resolved once per audit instead of per check
+ContentProfile = namedtuple(
+    "ContentProfile", "word_count density words_per_lsi readability subheadings schema"
+)
+
+CONTENT_PROFILES = {
+    "Blog Post": ContentProfile((1200, 2000), (1.0, 2.5), 400, 60, 2, ("Article", "BlogPosting")),
+    "Pillar Page": ContentProfile((2000, 4000), (0.8, 1.5), 300, 55, 5, ("Article", "WebPage")),
+    "Product Page": ContentProfile((500, 800), (1.5, 3.0), 400, 65, 1, ("Product",)),
+    "Service Page": ContentProfile((700, 1200), (1.0, 2.0), 400, 60, 2, ("Service", "LocalBusiness", "Organization")),
+    "FAQ Page": ContentProfile((300, 700), (0.8, 1.5), 350, 70, 3, ("FAQPage",)),
+    "Landing Page": ContentProfile((400, 900), (0.5, 1.2), 500, 65, 1, ("WebPage",)),
+    "Home Page": ContentProfile((400, 1200), (0.8, 1.8), 450, 60, 2, ("WebPage", "Organization")),
+    "News Article": ContentProfile((600, 1000), (0.8, 1.8), 400, 60, 2, ("NewsArticle", "Article")),
+}
+DEFAULT_PROFILE = ContentProfile((600, 1500), (0.8, 2.0), 400, 60, 2, ("WebPage",))
+
+
+def score_content_pillar(profile: ContentProfile, text: str, primary_kw: str, lsi_terms: list[str], originality_pct: float | None, dom: dict, wc: int):
     """
     Returns: (score_obtained, score_available, details, suggestions)
     """
@@ -178,23 +327,11 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
     suggestions = []
     details = {}
 
-    wc = count_words(text)
     details["Word Count"] = wc
 
-    # Ideal word counts
-    ideal_wc = {
-        "Blog Post": (1200, 2000),
-        "Pillar Page": (2000, 4000),
-        "Product Page": (500, 800),
-        "Service Page": (700, 1200),
-        "FAQ Page": (300, 700),
-        "Landing Page": (400, 900),
-        "Home Page": (400, 1200),
-        "News Article": (600, 1000),
-    }
     # 3 marks
     available += 3
-    low, high = ideal_wc.get(content_type, (600, 1500))
+    low, high = profile.word_count
     if low <= wc <= high:
         score += 3
         details["Word Count Score"] = "3 / 3"
@@ -209,23 +346,15 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
     # Keyword density (3 marks)
     available += 3
     primary_kw = primary_kw.strip()
+    kw = primary_kw.lower()
     dens = 0.0
     if primary_kw and wc > 0:
-        occurrences = len(re.findall(re.escape(primary_kw), text, flags=re.I))
+        # Literal, non-overlapping substring count (same as the old escaped re.I findall)
+        occurrences = text.lower().count(kw)
         dens = (occurrences / wc) * 100.0
     details["Keyword Density (%)]"] = round(dens, 2)
 
-    density_ranges = {
-        "Blog Post": (1.0, 2.5),
-        "Pillar Page": (0.8, 1.5),
-        "Product Page": (1.5, 3.0),
-        "Service Page": (1.0, 2.0),
-        "Landing Page": (0.5, 1.2),
-        "FAQ Page": (0.8, 1.5),
-        "Home Page": (0.8, 1.8),
-        "News Article": (0.8, 1.8),
-    }
-    dens_low, dens_high = density_ranges.get(content_type, (0.8, 2.0))
+    dens_low, dens_high = profile.density
     if dens_low <= dens <= dens_high:
         score += 3
         details["Keyword Density Score"] = "3 / 3"
@@ -241,21 +370,21 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
     available += 5
     placement_score = 0
     # Title, meta, intro(=first 100 words), H1, H2/H3 presence
-    intro = " ".join(text.split()[:100]).lower()
-    h1s = [h.get_text(" ").strip().lower() for h in soup_global.find_all("h1")]
-    h2h3s = [h.get_text(" ").strip().lower() for h in soup_global.find_all(["h2", "h3"])]
+    intro = " ".join(text.split(maxsplit=100)[:100]).lower()
+    h1s = [h.get_text(" ").strip().lower() for h in dom["h1"]]
+    h2h3s = [h.get_text(" ").strip().lower() for h in dom["h2h3"]]
 
-    if primary_kw:
-        if primary_kw.lower() in (soup_global.title.get_text(" ").lower() if soup_global.title else ""):
+    if kw:
+        if kw in (dom["title"].get_text(" ").lower() if dom["title"] else ""):
             placement_score += 1
-        meta_tag = soup_global.find("meta", attrs={"name": "description"})
-        if meta_tag and primary_kw.lower() in meta_tag.get("content", "").lower():
+        meta_tag = dom["meta_desc"]
+        if meta_tag and kw in meta_tag.get("content", "").lower():
             placement_score += 1
-        if primary_kw.lower() in intro:
+        if kw in intro:
             placement_score += 1
-        if any(primary_kw.lower() in h for h in h1s):
+        if any(kw in h for h in h1s):
             placement_score += 1
-        if any(primary_kw.lower() in h for h in h2h3s):
+        if any(kw in h for h in h2h3s):
             placement_score += 1
 
     score += placement_score
@@ -265,22 +394,13 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
 
     # LSI terms (3 marks)
     available += 3
-    lsi_terms = [t.strip() for t in lsi_terms if t.strip()]
-    lsi_score = 0
+    lsi_score = 0  # lsi_terms arrive stripped and non-empty from run_audit
     if lsi_terms:
-        hits = sum(1 for t in lsi_terms if re.search(re.escape(t), text, flags=re.I))
-        # Target per content type
-        lsi_ratio = {
-            "Blog Post": 400,
-            "Pillar Page": 300,
-            "Product Page": 400,
-            "Service Page": 400,
-            "FAQ Page": 350,
-            "Landing Page": 500,
-            "Home Page": 450,
-            "News Article": 400,
-        }
-        per = lsi_ratio.get(content_type, 400)
+        # One whole-word pass for all terms (longest first so phrases win over their prefixes)
+        alternation = "|".join(re.escape(t) for t in sorted(lsi_terms, key=len, reverse=True))
+        lsi_re = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.I)
+        hits = len({m.group(0).lower() for m in lsi_re.finditer(text)})
+        per = profile.words_per_lsi
         ideal_terms = max(1, round(wc / per))
         coverage = (hits / ideal_terms) if ideal_terms > 0 else 0
         details["LSI Target"] = ideal_terms
@@ -304,11 +424,7 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
     available += 3
     fre = flesch_reading_ease(text)
     details["Flesch Reading Ease"] = fre
-    thresholds = {
-        "Blog Post": 60, "Pillar Page": 55, "Product Page": 65, "Service Page": 60,
-        "FAQ Page": 70, "Landing Page": 65, "Home Page": 60, "News Article": 60,
-    }
-    th = thresholds.get(content_type, 60)
+    th = profile.readability
     if fre >= th:
         score += 3
         details["Readability Score"] = "3 / 3"
@@ -340,14 +456,14 @@ def score_content_pillar(content_type: str, text: str, primary_kw: str, lsi_term
     return score, available, details, suggestions
 
 
-def score_html_pillar(soup: BeautifulSoup, content_type: str):
+def score_html_pillar(dom: dict, json_ld: list, profile: ContentProfile):
     score = 0.0
     available = 10.0
     suggestions = []
     details = {}
 
     # Title length (1)
-    title = soup.title.get_text(" ").strip() if soup.title else ""
+    title = dom["title"].get_text(" ").strip() if dom["title"] else ""
     tl = len(title)
     details["Title Length"] = tl
     if tl <= 60 and tl >= 10:
@@ -362,7 +478,7 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
         suggestions.append("Fix title: missing or outside ideal length.")
 
     # Meta description (1)
-    meta_desc = soup.find("meta", attrs={"name": "description"})
+    meta_desc = dom["meta_desc"]
     md = meta_desc.get("content", "").strip() if meta_desc else ""
     details["Meta Description Length"] = len(md)
     if 150 <= len(md) <= 160:
@@ -377,7 +493,7 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
         suggestions.append("Add a meta description (150–160 chars).")
 
     # H1 (2)
-    h1s = soup.find_all("h1")
+    h1s = dom["h1"]
     details["H1 Count"] = len(h1s)
     if len(h1s) == 1:
         score += 2
@@ -391,12 +507,8 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
         suggestions.append("Add a descriptive H1.")
 
     # H2+ structure (2)
-    need_map = {
-        "Blog Post": 2, "Pillar Page": 5, "Product Page": 1, "Service Page": 2,
-        "FAQ Page": 3, "Landing Page": 1, "Home Page": 2, "News Article": 2
-    }
-    needed = need_map.get(content_type, 2)
-    h2plus = len(soup.find_all(["h2", "h3", "h4"]))
+    needed = profile.subheadings
+    h2plus = len(dom["h2h3h4"])
     details["H2+ Count"] = h2plus
     if h2plus >= needed:
         score += 2
@@ -410,7 +522,7 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
         suggestions.append(f"Add subheadings (need ≥ {needed}).")
 
     # Alt text coverage (2)
-    imgs = soup.find_all("img")
+    imgs = dom["img"]
     with_alt = sum(1 for i in imgs if i.get("alt") and i.get("alt").strip())
     coverage = pct(with_alt, len(imgs)) if imgs else 100.0
     details["Alt Coverage %"] = coverage
@@ -427,17 +539,7 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
 
     # Schema type (2)
     schema_ok = False
-    json_ld = try_get_json_ld(soup)
-    target_schema = {
-        "Blog Post": ["Article", "BlogPosting"],
-        "Pillar Page": ["Article", "WebPage"],
-        "Product Page": ["Product"],
-        "Service Page": ["Service", "LocalBusiness", "Organization"],
-        "FAQ Page": ["FAQPage"],
-        "Landing Page": ["WebPage"],
-        "Home Page": ["WebPage", "Organization"],
-        "News Article": ["NewsArticle", "Article"],
-    }.get(content_type, ["WebPage"])
+    target_schema = profile.schema
     found_types = []
     for item in json_ld:
         t = item.get("@type") if isinstance(item, dict) else None
@@ -462,14 +564,13 @@ def score_html_pillar(soup: BeautifulSoup, content_type: str):
     return score, available, details, suggestions
 
 
-def score_url_links_pillar(url: str, soup: BeautifulSoup, primary_kw: str):
+def score_url_links_pillar(url: str, dom: dict, primary_kw: str):
     score = 0.0
     available = 10.0
     suggestions = []
     details = {}
 
     # URL length (2)
-    path_full = urlparse(url).path or "/"
     url_chars = len(url.replace("https://", "").replace("http://", ""))
     details["URL Length (chars)"] = url_chars
     if 30 <= url_chars <= 65:
@@ -494,7 +595,7 @@ def score_url_links_pillar(url: str, soup: BeautifulSoup, primary_kw: str):
         suggestions.append("Include 1–2 primary keywords in the URL slug.")
 
     # Canonical (1)
-    can = soup.find("link", rel=lambda x: x and "canonical" in x.lower())
+    can = dom["canonical"]
     details["Canonical Tag"] = can.get("href") if can else "Missing"
     if can and can.get("href"):
         score += 1
@@ -504,15 +605,17 @@ def score_url_links_pillar(url: str, soup: BeautifulSoup, primary_kw: str):
         suggestions.append("Add a correct canonical tag.")
 
     # Internal / External links (2 + 2)
-    a_tags = soup.find_all("a", href=True)
-    domain = urlparse(url).netloc
+    a_tags = dom["a"]
+    domain = urlsplit(url).netloc
     internals, externals = 0, 0
     for a in a_tags:
         href = a["href"]
         if href.startswith("#") or href.lower().startswith("javascript:"):
             continue
-        full = urljoin(url, href)
-        if urlparse(full).netloc == domain:
+        # Classify without joining: only a scheme or //host can move a link off-site
+        parts = urlsplit(href)
+        netloc = parts.netloc if (parts.scheme or parts.netloc) else domain
+        if netloc == domain:
             internals += 1
         else:
             externals += 1
@@ -542,13 +645,9 @@ def score_url_links_pillar(url: str, soup: BeautifulSoup, primary_kw: str):
         details["External Links Score"] = "0 / 2"
 
     # Broken links (2)
-    broken = 0
-    check_sample = a_tags[:15]  # limit for speed
-    for a in check_sample:
-        full = urljoin(url, a["href"])
-        r = fetch_resource_head(full, timeout=6)
-        if not r or r.status_code >= 400:
-            broken += 1
+    check_sample = [urljoin(url, a["href"]) for a in a_tags[:15]]  # limit for speed
+    heads = fetch_heads(check_sample)
+    broken = sum(1 for u in check_sample if not heads[u] or heads[u].status_code >= 400)
     details["Broken Links (sample of ~15)"] = broken
     if broken == 0:
         score += 2
@@ -564,22 +663,28 @@ def score_url_links_pillar(url: str, soup: BeautifulSoup, primary_kw: str):
     return score, available, details, suggestions
 
 
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_pagespeed_audits(url: str, api_key: str) -> dict:
+    # Raises on failure so a 5xx / quota 429 is not cached and the next run asks PSI again
+    endpoint = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
+    params = {
+        "url": url,
+        "strategy": "mobile",
+        "fields": PSI_FIELDS,
+    }
+    if api_key:
+        params["key"] = api_key
+    r = SESSION.get(endpoint, params=params, timeout=45)
+    if r.status_code != 200:
+        raise requests.HTTPError(f"HTTP {r.status_code}", response=r)
+    # Lighthouse audits
+    return r.json().get("lighthouseResult", {}).get("audits", {})
+
+
 def get_pagespeed_metrics(url: str, api_key: str):
     # Returns dict or None
     try:
-        endpoint = "https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-        params = {
-            "url": url,
-            "strategy": "mobile",
-        }
-        if api_key:
-            params["key"] = api_key
-        r = requests.get(endpoint, params=params, timeout=45)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        # Lighthouse audits
-        audits = data.get("lighthouseResult", {}).get("audits", {})
+        audits = fetch_pagespeed_audits(url, api_key)
         lcp = audits.get("largest-contentful-paint", {}).get("numericValue")
         cls = audits.get("cumulative-layout-shift", {}).get("numericValue")
         fid_like = audits.get("interactive", {}).get("numericValue")  # not FID, but we note
@@ -598,14 +703,13 @@ def get_pagespeed_metrics(url: str, api_key: str):
         return None
 
 
-def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
+def score_performance_pillar(url: str, dom: dict, psi: dict | None):
     score = 0.0
     available = 30.0
     suggestions = []
     details = {}
 
     # Try PSI
-    psi = get_pagespeed_metrics(url, psi_key) if psi_key else None
     if psi:
         lcp = psi.get("lcp")
         cls = psi.get("cls")
@@ -681,21 +785,22 @@ def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
         # Heuristic fallback (labelled)
         details["Performance Mode"] = "Heuristic (no PSI key)"
         # LCP heuristic: hero image presence + page weight proxy by images HEAD
-        imgs = soup.find_all("img")
-        total_img_kb = 0
-        checked = 0
-        for img in imgs[:8]:  # limit
-            src = img.get("src") or img.get("data-src")
-            if not src:
-                continue
-            full = urljoin(url, src)
-            r = fetch_resource_head(full, timeout=6)
-            if r and "content-length" in r.headers:
-                try:
-                    total_img_kb += int(r.headers["content-length"]) / 1024.0
-                    checked += 1
-                except Exception:
-                    continue
+        imgs = dom["img"]
+        # Resolve the first 15 image sources once; (position, src, absolute URL)
+        sampled = [
+            (i, src, urljoin(url, src))
+            for i, img in enumerate(imgs[:15])
+            if (src := img.get("src") or img.get("data-src"))
+        ]
+        # HEAD each distinct image once and keep its size (None if unknown) for the LCP + media checks
+        heads = fetch_heads(full for _, _, full in sampled)
+        size_kb = {}
+        for full, r in heads.items():
+            try:
+                size_kb[full] = int(r.headers["content-length"]) / 1024.0
+            except Exception:
+                size_kb[full] = None
+        total_img_kb = sum(size_kb[full] or 0 for i, _, full in sampled if i < 8)  # limit
         details["Image Weight (sample KB)"] = round(total_img_kb, 1)
 
         # LCP (6): penalize heavy above-the-fold images (very rough)
@@ -711,8 +816,9 @@ def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
             suggestions.append("Large image payload; optimize hero & critical media.")
 
         # FID proxy (5): inline script size
-        scripts = soup.find_all("script")
-        inline_bytes = sum(len(s.get_text() or "") for s in scripts if not s.get("src"))
+        scripts = dom["script"]
+        # A <script> holds a single text node, so .string is its whole body
+        inline_bytes = sum(len(s.string or "") for s in scripts if not s.get("src"))
         if inline_bytes <= 20000:
             score += 4
             details["FID Heuristic Score"] = "4 / 5"
@@ -738,9 +844,8 @@ def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
             suggestions.append("Many images without dimensions; reserve space.")
 
         # Load time proxy (6): count external resources
-        links = soup.find_all("link", href=True)
         js_ext = [s for s in scripts if s.get("src")]
-        css_ext = [l for l in links if l.get("rel") and "stylesheet" in " ".join(l.get("rel")).lower()]
+        css_ext = dom["stylesheet"]
         ext_count = len(js_ext) + len(css_ext)
         details["External JS+CSS Count"] = ext_count
         if ext_count <= 10:
@@ -757,19 +862,9 @@ def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
         # Media optimization (8): image sizes & formats
         large_imgs = 0
         webp_avif = 0
-        for img in imgs[:15]:
-            src = img.get("src") or img.get("data-src")
-            if not src:
-                continue
-            full = urljoin(url, src)
-            r = fetch_resource_head(full, timeout=6)
-            if r and "content-length" in r.headers:
-                try:
-                    size_kb = int(r.headers["content-length"]) / 1024.0
-                    if size_kb > 150:
-                        large_imgs += 1
-                except Exception:
-                    pass
+        for _, src, full in sampled:
+            if (size_kb[full] or 0) > 150:
+                large_imgs += 1
             if src.lower().endswith((".webp", ".avif")):
                 webp_avif += 1
         details["Large Images (>150KB, sample)"] = large_imgs
@@ -792,14 +887,14 @@ def score_performance_pillar(url: str, soup: BeautifulSoup, psi_key: str):
     return score, available, details, suggestions
 
 
-def score_mobile_pillar(url: str, soup: BeautifulSoup):
+def score_mobile_pillar(url: str, html: str, dom: dict):
     score = 0.0
     available = 30.0
     suggestions = []
     details = {}
 
     # Viewport meta (4)
-    vp = soup.find("meta", attrs={"name": "viewport"})
+    vp = dom["viewport"]
     vp_content = vp.get("content", "").lower() if vp else ""
     details['Viewport Meta'] = vp_content if vp else "Missing"
     if vp and "width=device-width" in vp_content and "initial-scale=1" in vp_content:
@@ -814,17 +909,15 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
         suggestions.append("Add viewport meta for mobile responsiveness.")
 
     # Responsive layout detection via @media presence in CSS (6)
-    css_links = [l.get("href") for l in soup.find_all("link", rel=True, href=True) if "stylesheet" in " ".join(l.get("rel")).lower()]
-    media_found = False
-    for href in css_links[:3]:
-        full = urljoin(url, href)
-        try:
-            r = requests.get(full, headers=HEADERS, timeout=10)
-            if r.status_code == 200 and re.search(r"@media\s*\(max\-width|\(min\-width", r.text, flags=re.I):
-                media_found = True
-                break
-        except Exception:
-            continue
+    # Download the first three stylesheets once, concurrently, and run both the @media
+    # and the base font-size check (scored further down) in one pass over each body
+    css_bodies = fetch_texts(urljoin(url, l.get("href")) for l in dom["stylesheet"][:3])
+    media_found = css_16 = False
+    for css in css_bodies:
+        media_found = media_found or bool(_MEDIA_RE.search(css))
+        css_16 = css_16 or bool(_FONT16_RE.search(css))
+        if media_found and css_16:
+            break
     details["Responsive CSS (@media)"] = "Yes" if media_found else "Not detected"
     if media_found:
         score += 6
@@ -834,8 +927,7 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
         suggestions.append("Add responsive CSS media queries.")
 
     # Tap targets (5) – heuristic: check for buttons/links count and padding classes/hints
-    buttons = soup.find_all(["button", "a", "input"])
-    probable_ctas = sum(1 for b in buttons if "btn" in " ".join(b.get("class", [])).lower() or b.name == "button")
+    probable_ctas = len(dom["cta"])
     details["CTA/Tap Elements (count)"] = probable_ctas
     if probable_ctas >= 3:
         score += 3
@@ -845,8 +937,10 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
         suggestions.append("Ensure tappable elements are ≥48px and well spaced on mobile.")
 
     # Tap spacing (4) – heuristic via presence of CSS classes like gap-*, p-*, or margin utility
-    html_txt = str(soup)[:200_000]
-    spacing_hint = bool(re.search(r"(gap\-|padding|margin|px;|rem;)", html_txt, flags=re.I))
+    # Scan the fetched markup directly rather than re-serializing the soup; str "in" is a
+    # C-level substring search and stops at the first literal found
+    head = html[:200_000].lower()
+    spacing_hint = any(hint in head for hint in _SPACING_HINTS)
     details["Tap Spacing Hint"] = "Detected" if spacing_hint else "Not detected"
     if spacing_hint:
         score += 3
@@ -856,18 +950,9 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
         suggestions.append("Increase spacing between links/buttons (≥8px).")
 
     # Font size (5) – heuristic: look for base 16px in CSS or <body> styles
-    body = soup.find("body")
+    body = dom["body"]
     inline_style = (body.get("style") if body else "") or ""
-    base16 = "font-size:16px" in inline_style.replace(" ", "").lower()
-    css_16 = False
-    for href in css_links[:3]:
-        try:
-            r = requests.get(urljoin(url, href), headers=HEADERS, timeout=10)
-            if r.status_code == 200 and re.search(r"font-size\s*:\s*1?6px", r.text, flags=re.I):
-                css_16 = True
-                break
-        except Exception:
-            continue
+    base16 = bool(_BODY_FONT16_RE.search(inline_style))
     details["Font Base ≥16px"] = "Yes" if (base16 or css_16) else "Not confirmed"
     if base16 or css_16:
         score += 4
@@ -877,7 +962,7 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
         suggestions.append("Ensure body text is 16–22px on mobile; ≥90% readable.")
 
     # Popups (6) – heuristic: detect common modal patterns
-    has_popup = bool(soup.find(attrs={"role": "dialog"}) or soup.find(class_=re.compile(r"(modal|popup|overlay)", re.I)))
+    has_popup = dom["popup"]
     details["Popup Detected"] = "Yes" if has_popup else "No"
     if not has_popup:
         score += 6
@@ -895,31 +980,43 @@ def score_mobile_pillar(url: str, soup: BeautifulSoup):
 def run_audit(url: str, primary_kw: str, lsi_csv: str, originality_pct_input: str, psi_key: str):
     html = fetch_html(url)
     if not html:
-        return None, None
-
-    soup = BeautifulSoup(html, "html.parser")
-    global soup_global
-    soup_global = soup  # used in content pillar placement
+        return None
 
-    text = visible_text(soup)
-    json_ld = try_get_json_ld(soup)
-    ctype = detect_content_type(url, soup, text, json_ld)
+    # Network-bound work shares one pool. PSI is the slowest call of the audit, so it starts
+    # before parsing and overlaps everything below
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        psi_future = ex.submit(get_pagespeed_metrics, url, psi_key) if psi_key else None
 
-    # Convert inputs
-    lsi_terms = [t.strip() for t in (lsi_csv or "").split(",") if t.strip()]
-    originality_pct = None
-    if originality_pct_input.strip():
-        try:
-            originality_pct = float(originality_pct_input.strip())
-        except Exception:
-            originality_pct = None
+        soup = BeautifulSoup(html, PARSER)
 
-    # Pillars
-    p1_s, p1_av, p1_d, p1_sug = score_content_pillar(ctype, text, primary_kw, lsi_terms, originality_pct)
-    p2_s, p2_av, p2_d, p2_sug = score_html_pillar(soup, ctype)
-    p3_s, p3_av, p3_d, p3_sug = score_url_links_pillar(url, soup, primary_kw)
-    p4_s, p4_av, p4_d, p4_sug = score_performance_pillar(url, soup, psi_key)
-    p5_s, p5_av, p5_d, p5_sug = score_mobile_pillar(url, soup)
+        # Read JSON-LD and the scripts once, before visible_text() strips <script> from the tree
+        json_ld = try_get_json_ld(soup)
+        scripts = soup.find_all("script")
+        text = visible_text(soup)
+        wc = count_words(text)  # shared by content-type detection and the content pillar
+        dom = collect_dom(soup, scripts)
+        ctype = detect_content_type(url, dom, text, json_ld, wc)
+        profile = CONTENT_PROFILES.get(ctype, DEFAULT_PROFILE)
+
+        # Convert inputs
+        lsi_terms = [t.strip() for t in (lsi_csv or "").split(",") if t.strip()]
+        originality_pct = None
+        if originality_pct_input.strip():
+            try:
+                originality_pct = float(originality_pct_input.strip())
+            except Exception:
+                originality_pct = None
+
+        # Pillars: 3-5 wait on the network (link probes, PSI / image HEADs, CSS), so start them
+        # first and score the CPU-only pillars 1-2 while their requests are in flight
+        f3 = ex.submit(score_url_links_pillar, url, dom, primary_kw)
+        f4 = ex.submit(lambda: score_performance_pillar(url, dom, psi_future.result() if psi_future else None))
+        f5 = ex.submit(score_mobile_pillar, url, html, dom)
+        p1_s, p1_av, p1_d, p1_sug = score_content_pillar(profile, text, primary_kw, lsi_terms, originality_pct, dom, wc)
+        p2_s, p2_av, p2_d, p2_sug = score_html_pillar(dom, json_ld, profile)
+        p3_s, p3_av, p3_d, p3_sug = f3.result()
+        p4_s, p4_av, p4_d, p4_sug = f4.result()
+        p5_s, p5_av, p5_d, p5_sug = f5.result()
 
     pillars = [
         ("Content Quality & Relevance", p1_s, p1_av, p1_d, p1_sug, 20),
@@ -944,6 +1041,13 @@ def run_audit(url: str, primary_kw: str, lsi_csv: str, originality_pct_input: st
 
     return ctype, pillar_outputs, total_weighted, total_possible
 
+
+def run_audits(urls: list[str], primary_kw: str, lsi_csv: str, originality_pct_input: str, psi_key: str, max_workers: int = 4):
+    # Audit several pages at once (e.g. from a sitemap); each audit is mostly network waits, so
+    # threads overlap them. Results line up with urls, None where the page could not be fetched
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        return list(ex.map(lambda u: run_audit(u, primary_kw, lsi_csv, originality_pct_input, psi_key), urls))
+
 # ------------------------------
 # STREAMLIT UI
 # ------------------------------